@@ -1,17 +1,29 @@
-from flask import Flask, render_template, request, Response, send_file
+from flask import Blueprint, Flask, render_template, request, Response, send_file
 import io
 import csv
 import os
 import sys
+import itertools
+import operator
 from taxonomy import TaxonomyLoader
 from matcher import Matcher
 
-app = Flask(__name__)
+bp = Blueprint('mapper', __name__)
 
 # Configuration
 # Allow overriding via env var for Docker/Deployment
 TAXONOMY_FILE = os.environ.get("TAXONOMY_PATH", "taxonomy_release.txt")
 
+# Output columns, in CSV order
+CSV_COLUMNS = ('latin', 'common', 'original_latin', 'original_common')
+_csv_row_values = operator.attrgetter(*CSV_COLUMNS)
+
+# The header never changes, so encode it once; csv.writer terminates rows with \r\n
+CSV_HEADER = (','.join(CSV_COLUMNS) + '\r\n').encode('utf-8')
+
+# Number of result rows written per streamed chunk
+CSV_CHUNK_ROWS = 500
+
 # Global objects
 taxonomy = None
 matcher = None
@@ -27,18 +39,26 @@ def init_app():
         sys.exit(1)
 
     print(f"Loading taxonomy from: {TAXONOMY_FILE}")
-    taxonomy = TaxonomyLoader(TAXONOMY_FILE)
+    taxonomy = TaxonomyLoader.from_cache(TAXONOMY_FILE)
     matcher = Matcher(taxonomy)
     print("Taxonomy loaded successfully.")
 
-# Initialize on module load (for dev server)
-init_app()
+def create_app():
+    """
+    Load the taxonomy and build the Flask app. Nothing is loaded at import time, so
+    a WSGI server can call this once in its master process (e.g. gunicorn --preload)
+    and share the loaded taxonomy with its workers.
+    """
+    init_app()
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    return app
 
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html', gemini_available=matcher.is_available())
 
-@app.route('/process', methods=['POST'])
+@bp.route('/process', methods=['POST'])
 def process():
     input_text = request.form.get('input_text', '')
     location = request.form.get('location', '')
@@ -46,26 +66,32 @@ def process():
     
     results = matcher.process_input(input_text, location=location, user_api_key=user_api_key)
     
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    # Header: latin,common,original_latin,original_common
-    writer.writerow(['latin', 'common', 'original_latin', 'original_common'])
-    
-    for row in results:
-        writer.writerow([
-            row['latin'],
-            row['common'],
-            row['original_latin'],
-            row['original_common']
-        ])
-    
-    output.seek(0)
-    
+    # Stream the CSV row by row rather than building the whole body in memory
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk.encode('utf-8')
+
+        # Header: latin,common,original_latin,original_common
+        yield CSV_HEADER
+
+        rows = iter(results)
+        while True:
+            chunk = list(itertools.islice(rows, CSV_CHUNK_ROWS))
+            if not chunk:
+                break
+            writer.writerows(map(_csv_row_values, chunk))
+            yield flush()
+
     return Response(
-        output.getvalue(),
-        mimetype="text/plain"
+        generate_csv(),
+        mimetype="text/csv"
     )
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -1,7 +1,51 @@
 import re
 import os
+import functools
+from collections import defaultdict
 import google.generativeai as genai
-from taxonomy import TaxonomyLoader
+from taxonomy import TaxonomyLoader, normalize_name
+
+# orjson parses large Gemini responses considerably faster, but is optional
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Invariant instructions that open every Gemini prompt
+PROMPT_HEADER = "\n".join([
+    "Map the following biological terms to their standard scientific (Latin) name and Common name.",
+    "For each term, provide multiple candidate identifications in order of likelihood, as different taxonomies may use different names.",
+    "For each candidate, include the full taxonomic hierarchy (class, order, family, genus, species).",
+    "Return the result as a JSON list of objects with keys:",
+    "  - 'input_text': the original input",
+    "  - 'candidates': array of candidate objects, each with:",
+    "      - 'class': taxonomic class",
+    "      - 'order': taxonomic order",
+    "      - 'family': taxonomic family",
+    "      - 'genus': taxonomic genus",
+    "      - 'species': species epithet (not the full binomial, just the species part)",
+    "  - 'suggested_common': the most common English name",
+    "If you cannot identify a term, set candidates to an empty array.",
+])
+
+# Match levels above species; these are only kept when unique across the input
+HIGHER_MATCH_LEVELS = frozenset(('genus', 'family', 'order', 'class'))
+
+# Body of a Markdown code fence; tolerates a missing closing fence. A ```json
+# fence is preferred over any earlier plain ``` fence.
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)(?:```|\Z)', re.DOTALL)
+_FENCE_RE = re.compile(r'```\s*(.*?)(?:```|\Z)', re.DOTALL)
+
+def _strip_code_fence(content):
+    """
+    Return the body of the ```json fence in a Gemini response, or of its first
+    code fence if there's no ```json one, or the content unchanged if it has none.
+    """
+    fence = _JSON_FENCE_RE.search(content) or _FENCE_RE.search(content)
+    return fence.group(1) if fence else content
+
+# At most two whitespace-separated words ("Genus" or "Genus species")
+_LIKELY_LATIN_RE = re.compile(r'\s*(?:\S+(?:\s+\S+)?)?\s*')
 
 # Configure Gemini
 API_KEY = os.environ.get("GOOGLE_API_KEY")
@@ -17,10 +61,33 @@ if not API_KEY and os.path.exists("gemini-key.txt"):
 if API_KEY:
     genai.configure(api_key=API_KEY)
 
+class MatchResult:
+    """
+    One output row: the mapped SpeciesNet taxon (latin/common, empty if unmatched),
+    the user's original names, the raw input line, and the level at which Gemini
+    matched it (None for exact matches). Slotted to keep large result lists small.
+    """
+    __slots__ = ('latin', 'common', 'original_latin', 'original_common', 'raw_input', 'match_level')
+
+    def __init__(self, latin='', common='', original_latin='', original_common='', raw_input='', match_level=None):
+        self.latin = latin
+        self.common = common
+        self.original_latin = original_latin
+        self.original_common = original_common
+        self.raw_input = raw_input
+        self.match_level = match_level
+
+    def copy(self):
+        return MatchResult(self.latin, self.common, self.original_latin,
+                           self.original_common, self.raw_input, self.match_level)
+
 class Matcher:
     def __init__(self, taxonomy_loader: TaxonomyLoader):
         self.taxonomy = taxonomy_loader
         self.model = None
+        # The taxonomy is immutable once loaded, so exact-match results can be
+        # memoized per line; species lists tend to repeat the same names a lot.
+        self._exact_cache = functools.lru_cache(maxsize=8192)(self._match_single_line_exact)
         if API_KEY:
             try:
                 # User requested gemini-2.5-flash
@@ -32,33 +99,54 @@ class Matcher:
     def is_available(self):
         return self.model is not None
 
+    def get_model(self, user_api_key=None):
+        """
+        Return the Gemini model to use for a request: a client for the user-provided
+        key if there is one (falling back to the default model if it can't be built),
+        otherwise the default model. Returns None if no model is available.
+        """
+        if user_api_key:
+            try:
+                # Configure a temporary client for this request
+                return genai.GenerativeModel(
+                    model_name='gemini-2.5-flash',
+                    safety_settings=None, # Or configure as needed
+                    generation_config=None,
+                    tools=None,
+                    request_options={'api_key': user_api_key}
+                )
+            except Exception as e:
+                print(f"Failed to initialize Gemini with user-provided key: {e}")
+        return self.model
+
     def process_input(self, input_text, location=None, user_api_key=None):
         """
-        Process a full block of text and return list of result rows.
-        Result row: { 'latin': ..., 'common': ..., 'original_latin': ..., 'original_common': ... }
+        Process a full block of text and return list of result rows (MatchResult).
         """
-        lines = input_text.splitlines()
+        # Strip every line and drop blank ones up front, so the matching loop
+        # below only deals with case selection. Splitting on '\n' is enough here
+        # (form posts use \r\n, and the \r is stripped with the other whitespace).
+        lines = [line for line in (raw.strip() for raw in input_text.split('\n')) if line]
         results = []
 
         # First pass: Exact matching and parsing
+        # Unknowns are only collected if Gemini could be asked about them
+        use_gemini = bool(self.model or user_api_key)
         unknown_lines = []
 
         for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-
             result = self.match_single_line_exact(line)
-            if result['latin']:
+            if result.latin:
                 results.append(result)
             else:
                 # If no exact match, mark for Gemini processing
                 # We still create a result entry, but it might be incomplete
-                unknown_lines.append((i, line, result))
+                if use_gemini:
+                    unknown_lines.append((i, line, result))
                 results.append(result) # Placeholder, will update later
 
         # Second pass: Batch Gemini processing for unknowns
-        if unknown_lines and (self.model or user_api_key):
+        if unknown_lines:
             self.batch_process_with_gemini(unknown_lines, results, location, user_api_key)
 
         # Third pass: Resolve ambiguous higher-level matches
@@ -66,10 +154,14 @@ class Matcher:
 
         return results
 
-    def match_single_line_exact(self, line):
+    def match_single_line_exact(self, line: str) -> 'MatchResult':
         """
         Attempts to match a single line against the taxonomy using exact string matching.
+        Returns a fresh MatchResult, so callers are free to modify it.
         """
+        return self._exact_cache(line).copy()
+
+    def _match_single_line_exact(self, line: str) -> 'MatchResult':
         parts = [p.strip() for p in line.split(',')]
         
         original_latin = ""
@@ -79,24 +171,30 @@ class Matcher:
         
         match_found = False
 
+        # Taxonomy keys are normalized at load time, so each token is normalized
+        # once here and looked up by key directly
+        latin_get = self.taxonomy.get_by_latin_key
+        common_get = self.taxonomy.get_by_common_key
+
         # Case 1: Single token
         if len(parts) == 1:
             token = parts[0]
+            token_key = normalize_name(token)
             # Try as Latin
-            row = self.taxonomy.get_by_latin(token)
+            row = latin_get(token_key)
             if row:
                 match_found = True
                 original_latin = token
-                mapped_latin = row['latin']
-                mapped_common = row['common']
+                mapped_latin = row.latin
+                mapped_common = row.common
             else:
                 # Try as Common
-                row = self.taxonomy.get_by_common(token)
+                row = common_get(token_key)
                 if row:
                     match_found = True
                     original_common = token
-                    mapped_latin = row['latin']
-                    mapped_common = row['common']
+                    mapped_latin = row.latin
+                    mapped_common = row.common
                 else:
                     # Unknown single token
                     # Default to original_common as a fallback for single strings
@@ -108,10 +206,13 @@ class Matcher:
             p0 = parts[0]
             p1 = parts[1]
             
-            row0_l = self.taxonomy.get_by_latin(p0)
-            row0_c = self.taxonomy.get_by_common(p0)
-            row1_l = self.taxonomy.get_by_latin(p1)
-            row1_c = self.taxonomy.get_by_common(p1)
+            p0_key = normalize_name(p0)
+            p1_key = normalize_name(p1)
+
+            row0_l = latin_get(p0_key)
+            row0_c = common_get(p0_key)
+            row1_l = latin_get(p1_key)
+            row1_c = common_get(p1_key)
 
             # Heuristic: Latin, Common
             if row0_l and not row1_l:
@@ -119,16 +220,16 @@ class Matcher:
                  match_found = True
                  original_latin = p0
                  original_common = p1 # Assume p1 is common
-                 mapped_latin = row0_l['latin']
-                 mapped_common = row0_l['common']
+                 mapped_latin = row0_l.latin
+                 mapped_common = row0_l.common
             
             # Heuristic: Common, Latin
             elif row1_l and not row0_l:
                 match_found = True
                 original_latin = p1
                 original_common = p0
-                mapped_latin = row1_l['latin']
-                mapped_common = row1_l['common']
+                mapped_latin = row1_l.latin
+                mapped_common = row1_l.common
 
             # Heuristic: Common, Common (ambiguous, pick first valid?)
             elif row0_c:
@@ -140,8 +241,8 @@ class Matcher:
                  else:
                      original_latin = p1
                  
-                 mapped_latin = row0_c['latin']
-                 mapped_common = row0_c['common']
+                 mapped_latin = row0_c.latin
+                 mapped_common = row0_c.common
             
             elif row1_c:
                  match_found = True
@@ -149,8 +250,8 @@ class Matcher:
                  if self.is_likely_latin(p0):
                      original_latin = p0
                  
-                 mapped_latin = row1_c['latin']
-                 mapped_common = row1_c['common']
+                 mapped_latin = row1_c.latin
+                 mapped_common = row1_c.common
 
             else:
                 # Neither matched
@@ -163,146 +264,114 @@ class Matcher:
                 original_common = p0
                 original_latin = p1
 
-        return {
-            'latin': mapped_latin,
-            'common': mapped_common,
-            'original_latin': original_latin,
-            'original_common': original_common,
-            'raw_input': line
-        }
+        return MatchResult(
+            latin=mapped_latin,
+            common=mapped_common,
+            original_latin=original_latin,
+            original_common=original_common,
+            raw_input=line
+        )
 
-    def is_likely_latin(self, text):
+    def is_likely_latin(self, text: str) -> bool:
         # Very basic heuristic: 1 or 2 words, no special chars usually
         # Latin names are usually "Genus" or "Genus species"
-        words = text.split()
-        return len(words) <= 2
+        return _LIKELY_LATIN_RE.fullmatch(text) is not None
+
+    def build_prompt(self, items, location=None):
+        """
+        Build the Gemini prompt for a list of input terms, with optional study-area context.
+        """
+        # The instructions are invariant and precomputed
+        prompt_lines = [PROMPT_HEADER]
+        if location:
+            prompt_lines.append(f"Context: The species are observed in {location}.")
+        prompt_lines.append("Items:")
+        prompt_lines.extend(f"- {text}" for text in items)
+        return "\n".join(prompt_lines)
 
     def batch_process_with_gemini(self, unknown_items, results_list, location=None, user_api_key=None):
         """
-        unknown_items: list of (index, line_text, result_dict)
+        unknown_items: list of (index, line_text, result)
         """
-        model_to_use = self.model
-        
-        if user_api_key:
-            try:
-                # Configure a temporary client for this request
-                temp_genai = genai.GenerativeModel(
-                    model_name='gemini-2.5-flash',
-                    safety_settings=None, # Or configure as needed
-                    generation_config=None,
-                    tools=None,
-                    request_options={'api_key': user_api_key}
-                )
-                model_to_use = temp_genai
-            except Exception as e:
-                print(f"Failed to initialize Gemini with user-provided key: {e}")
-                # Fallback to default model or just return
-                if not model_to_use:
-                    return
-        
+        # Bail out before building anything if there is no usable model
+        model_to_use = self.get_model(user_api_key)
         if not model_to_use:
             print("Gemini processing skipped: no model available.")
             return
 
-        # Construct prompt
-        prompt_lines = ["Map the following biological terms to their standard scientific (Latin) name and Common name."]
-        if location:
-             prompt_lines.append(f"Context: The species are observed in {location}.")
-        prompt_lines.append("For each term, provide multiple candidate identifications in order of likelihood, as different taxonomies may use different names.")
-        prompt_lines.append("For each candidate, include the full taxonomic hierarchy (class, order, family, genus, species).")
-        prompt_lines.append("Return the result as a JSON list of objects with keys:")
-        prompt_lines.append("  - 'input_text': the original input")
-        prompt_lines.append("  - 'candidates': array of candidate objects, each with:")
-        prompt_lines.append("      - 'class': taxonomic class")
-        prompt_lines.append("      - 'order': taxonomic order")
-        prompt_lines.append("      - 'family': taxonomic family")
-        prompt_lines.append("      - 'genus': taxonomic genus")
-        prompt_lines.append("      - 'species': species epithet (not the full binomial, just the species part)")
-        prompt_lines.append("  - 'suggested_common': the most common English name")
-        prompt_lines.append("If you cannot identify a term, set candidates to an empty array.")
-        prompt_lines.append("Items:")
-        
-        batch_mapping = {} # index -> input_text
-        
-        for idx, text, _ in unknown_items:
-            prompt_lines.append(f"- {text}")
-            batch_mapping[idx] = text
-
-        prompt = "\n".join(prompt_lines)
+        prompt = self.build_prompt([text for _, text, _ in unknown_items], location)
 
         try:
             response = model_to_use.generate_content(prompt)
             # Parse JSON response. Gemini might wrap in ```json ... ```
             content = response.text
             # Basic cleanup
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            import json
-            data = json.loads(content)
+            content = _strip_code_fence(content)
+
+            data = json_loads(content)
             
             # Update results
             # We need to map back. The list order should be preserved, but let's use string matching if possible or just order.
             # Actually, asking for 'input_text' back is safer.
-            
-            for item in data:
-                inp = item.get('input_text')
-                candidates = item.get('candidates', [])
 
-                # Backward compatibility: support old format with candidate_latin_names
-                if not candidates and item.get('candidate_latin_names'):
-                    candidates = [{'genus': name.split()[0] if ' ' in name else name,
-                                   'species': name.split()[1] if ' ' in name and len(name.split()) > 1 else None}
-                                  for name in item.get('candidate_latin_names', [])]
+            # Index the pending results by their input text, so each returned
+            # item finds its row without scanning the whole results list
+            results_by_input = {}
+            for _, text, result in unknown_items:
+                results_by_input.setdefault(text, []).append(result)
 
+            for item in data:
+                inp = item.get('input_text')
                 if not inp:
                     continue
 
-                matched_entry = None
-                matched_level = None
-
-                # Try each candidate with hierarchical matching
-                for candidate in candidates:
-                    if not candidate:
-                        continue
-
-                    entry, level = self.taxonomy.get_by_hierarchy(
-                        tax_class=candidate.get('class'),
-                        tax_order=candidate.get('order'),
-                        tax_family=candidate.get('family'),
-                        tax_genus=candidate.get('genus'),
-                        tax_species=candidate.get('species')
-                    )
-
-                    if entry:
-                        matched_entry = entry
-                        matched_level = level
-                        break
-
-                # If no hierarchical match, try the common name as fallback
-                if not matched_entry:
-                    s_common_gemini = item.get('suggested_common')
-                    if s_common_gemini:
-                        matched_entry = self.taxonomy.get_by_common(s_common_gemini)
-                        if matched_entry:
-                            matched_level = 'common_name_fallback'
+                matched_entry, matched_level = self.match_gemini_item(item)
 
                 # Update the corresponding result in results_list
-                # Find the result with raw_input == inp
-                for res in results_list:
-                    if res['raw_input'] == inp and not res['latin']:
+                # Find the first still-unmatched result with raw_input == inp
+                for res in results_by_input.get(inp, ()):
+                    if not res.latin:
                         if matched_entry:
-                            res['latin'] = matched_entry['latin']
-                            res['common'] = matched_entry['common']
-                            res['match_level'] = matched_level  # Store for uniqueness checking
+                            res.latin = matched_entry.latin
+                            res.common = matched_entry.common
+                            res.match_level = matched_level  # Store for uniqueness checking
                         break
 
         except Exception as e:
             print(f"Gemini Batch Error: {e}")
             # Fallback: Do nothing, results remain empty
 
+    def match_gemini_item(self, item):
+        """
+        Match one item from a Gemini response against the taxonomy: each candidate
+        hierarchy in order, then the suggested common name as a fallback.
+        Returns (matched_entry, match_level), or (None, None) if nothing matched.
+        """
+        candidates = item.get('candidates', [])
+
+        # Backward compatibility: support old format with candidate_latin_names
+        if not candidates and item.get('candidate_latin_names'):
+            candidates = [{'genus': name.split()[0] if ' ' in name else name,
+                           'species': name.split()[1] if ' ' in name and len(name.split()) > 1 else None}
+                          for name in item.get('candidate_latin_names', [])]
+
+        # Try each candidate with hierarchical matching, in order. The tuples are
+        # built lazily, so candidates after the first match are never looked at.
+        matched_entry, matched_level = self.taxonomy.get_first_by_hierarchy(
+            (c.get('class'), c.get('order'), c.get('family'), c.get('genus'), c.get('species'))
+            for c in candidates if c
+        )
+
+        # If no hierarchical match, try the common name as fallback
+        if not matched_entry:
+            s_common_gemini = item.get('suggested_common')
+            if s_common_gemini:
+                matched_entry = self.taxonomy.get_by_common(s_common_gemini)
+                if matched_entry:
+                    matched_level = 'common_name_fallback'
+
+        return (matched_entry, matched_level)
+
     def resolve_ambiguous_matches(self, results):
         """
         Post-processing step to handle ambiguous higher-level matches.
@@ -312,26 +381,21 @@ class Matcher:
         """
         # Group results by matched taxon (latin name) and match level
         # Only consider higher-level matches (not species or exact matches)
-        higher_level_matches = {}  # latin_name -> list of result indices
-
-        for i, result in enumerate(results):
-            match_level = result.get('match_level')
-            latin = result.get('latin')
+        higher_level_matches = defaultdict(list)  # latin_name -> list of results
 
+        for result in results:
             # Only consider higher-level matches (genus, family, order, class)
-            if match_level and match_level in ['genus', 'family', 'order', 'class'] and latin:
-                if latin not in higher_level_matches:
-                    higher_level_matches[latin] = []
-                higher_level_matches[latin].append(i)
+            if result.match_level in HIGHER_MATCH_LEVELS and result.latin:
+                higher_level_matches[result.latin].append(result)
 
         # For each higher-level taxon that has multiple matches, clear those results
-        for latin_name, indices in higher_level_matches.items():
-            if len(indices) > 1:
+        for matched in higher_level_matches.values():
+            if len(matched) > 1:
                 # Multiple inputs matched to the same higher-level taxon - ambiguous!
-                for idx in indices:
-                    results[idx]['latin'] = ''
-                    results[idx]['common'] = ''
-                    results[idx]['match_level'] = 'ambiguous'  # Mark as ambiguous for debugging
+                for result in matched:
+                    result.latin = ''
+                    result.common = ''
+                    result.match_level = 'ambiguous'  # Mark as ambiguous for debugging
 
 
 if __name__ == '__main__':
@@ -366,7 +430,7 @@ Examples:
         sys.exit(1)
 
     print(f"Loading taxonomy from: {taxonomy_file}")
-    taxonomy = TaxonomyLoader(taxonomy_file)
+    taxonomy = TaxonomyLoader.from_cache(taxonomy_file)
     matcher = Matcher(taxonomy)
 
     if not matcher.is_available():
@@ -395,13 +459,13 @@ Examples:
             result = matcher.match_single_line_exact(query)
 
             print(f"  Input parsing:")
-            print(f"    Original Latin:  '{result['original_latin']}'")
-            print(f"    Original Common: '{result['original_common']}'")
+            print(f"    Original Latin:  '{result.original_latin}'")
+            print(f"    Original Common: '{result.original_common}'")
 
-            if result['latin']:
+            if result.latin:
                 print(f"\n  ✓ EXACT MATCH FOUND")
-                print(f"    Mapped Latin:  {result['latin']}")
-                print(f"    Mapped Common: {result['common']}")
+                print(f"    Mapped Latin:  {result.latin}")
+                print(f"    Mapped Common: {result.common}")
             else:
                 print(f"\n  ✗ No exact match found")
 
@@ -411,9 +475,9 @@ Examples:
                     latin_row = taxonomy.get_by_latin(part)
                     common_row = taxonomy.get_by_common(part)
                     if latin_row:
-                        print(f"    '{part}' found as Latin: {latin_row['latin']} ({latin_row['common']})")
+                        print(f"    '{part}' found as Latin: {latin_row.latin} ({latin_row.common})")
                     elif common_row:
-                        print(f"    '{part}' found as Common: {common_row['latin']} ({common_row['common']})")
+                        print(f"    '{part}' found as Common: {common_row.latin} ({common_row.common})")
                     else:
                         print(f"    '{part}' not found in taxonomy")
 
@@ -423,27 +487,8 @@ Examples:
 
                     # Make a direct call to see what Gemini suggests
                     try:
-                        import json
-
                         # Build prompt (same as batch processing)
-                        prompt_lines = ["Map the following biological terms to their standard scientific (Latin) name and Common name."]
-                        if args.location:
-                            prompt_lines.append(f"Context: The species are observed in {args.location}.")
-                        prompt_lines.append("For each term, provide multiple candidate identifications in order of likelihood, as different taxonomies may use different names.")
-                        prompt_lines.append("For each candidate, include the full taxonomic hierarchy (class, order, family, genus, species).")
-                        prompt_lines.append("Return the result as a JSON list of objects with keys:")
-                        prompt_lines.append("  - 'input_text': the original input")
-                        prompt_lines.append("  - 'candidates': array of candidate objects, each with:")
-                        prompt_lines.append("      - 'class': taxonomic class")
-                        prompt_lines.append("      - 'order': taxonomic order")
-                        prompt_lines.append("      - 'family': taxonomic family")
-                        prompt_lines.append("      - 'genus': taxonomic genus")
-                        prompt_lines.append("      - 'species': species epithet (not the full binomial, just the species part)")
-                        prompt_lines.append("  - 'suggested_common': the most common English name")
-                        prompt_lines.append("If you cannot identify a term, set candidates to an empty array.")
-                        prompt_lines.append("Items:")
-                        prompt_lines.append(f"- {query}")
-                        prompt = "\n".join(prompt_lines)
+                        prompt = matcher.build_prompt([query], args.location)
 
                         response = matcher.model.generate_content(prompt)
                         content = response.text
@@ -452,12 +497,9 @@ Examples:
                         print(f"    {content[:400]}{'...' if len(content) > 400 else ''}")
 
                         # Parse response
-                        if "```json" in content:
-                            content = content.split("```json")[1].split("```")[0]
-                        elif "```" in content:
-                            content = content.split("```")[1].split("```")[0]
+                        content = _strip_code_fence(content)
 
-                        data = json.loads(content.strip())
+                        data = json_loads(content.strip())
 
                         if data and len(data) > 0:
                             suggestion = data[0]
@@ -505,12 +547,12 @@ Examples:
                             if matched_entry:
                                 print(f"\n  ✓ MATCH FOUND IN TAXONOMY (candidate #{match_index})")
                                 print(f"    Matched at: {matched_level.upper()} level")
-                                print(f"    Mapped Latin:  {matched_entry['latin']}")
-                                print(f"    Mapped Common: {matched_entry['common']}")
+                                print(f"    Mapped Latin:  {matched_entry.latin}")
+                                print(f"    Mapped Common: {matched_entry.common}")
 
                                 if matched_level != 'species':
                                     print(f"    Note: Matched at {matched_level} level (not species)")
-                                    print(f"          This match may be rejected if other inputs also match to '{matched_entry['latin']}'")
+                                    print(f"          This match may be rejected if other inputs also match to '{matched_entry.latin}'")
                             else:
                                 print(f"\n  ✗ No hierarchical match found in taxonomy")
 
@@ -519,7 +561,7 @@ Examples:
                                     row_by_common = taxonomy.get_by_common(suggested_common)
                                     if row_by_common:
                                         print(f"    However, suggested common name IS in taxonomy:")
-                                        print(f"      {row_by_common['latin']} ({row_by_common['common']})")
+                                        print(f"      {row_by_common.latin} ({row_by_common.common})")
                                     else:
                                         print(f"    Common name also not found in taxonomy.")
                         else:
@@ -539,9 +581,9 @@ Examples:
         print("=" * 90)
 
         for result in results:
-            input_display = result['raw_input'][:28] + '..' if len(result['raw_input']) > 30 else result['raw_input']
-            latin_display = result['latin'][:28] + '..' if len(result['latin']) > 30 else result['latin']
-            common_display = result['common'][:28] + '..' if len(result['common']) > 30 else result['common']
+            input_display = result.raw_input[:28] + '..' if len(result.raw_input) > 30 else result.raw_input
+            latin_display = result.latin[:28] + '..' if len(result.latin) > 30 else result.latin
+            common_display = result.common[:28] + '..' if len(result.common) > 30 else result.common
 
-            status = '✓' if result['latin'] else '✗'
+            status = '✓' if result.latin else '✗'
             print(f"{status} {input_display:<28} {latin_display:<30} {common_display:<30}")
@@ -1,72 +1,330 @@
 import os
 import csv
+import pickle
+import functools
+import unicodedata
+from collections import namedtuple
+
+# pyarrow's multithreaded CSV reader is used when available, but is optional
+try:
+    import pyarrow
+    import pyarrow.csv as pyarrow_csv
+except ImportError:
+    pyarrow = None
+
+def normalize_name(name):
+    """
+    Normalize a Latin or common name into the form used for taxonomy dict keys:
+    NFKC-normalized, stripped and casefolded, so e.g. composed and decomposed accents
+    match. Keys are normalized once at load time, so lookups only need this on the query.
+    """
+    return unicodedata.normalize('NFKC', name).strip().casefold()
+
+def normalize_names(names):
+    """
+    normalize_name for a whole column of names at once: an all-ASCII column is
+    casefolded in a single call rather than one call per name. Names must not
+    contain newlines.
+    """
+    if not names:
+        return []
+    joined = '\n'.join(names)
+    if joined.isascii():
+        # ASCII text is already in NFKC form
+        return list(map(str.strip, joined.casefold().split('\n')))
+    # casefold() is only fast on pure-ASCII strings; one accented name would put
+    # the whole joined column on the slow path, so fold name by name instead
+    return list(map(normalize_name, names))
+
+class TaxonomyEntry(namedtuple('TaxonomyEntry', ['guid', 'class_', 'order', 'family', 'genus', 'species', 'common', 'latin'])):
+    """
+    A taxonomy row as returned by the lookup methods, built on demand from the
+    loader's column lists. 'common' is the canonical common name, 'latin' the
+    standardized lowercase Latin name.
+    """
+    __slots__ = ()
+
+    @property
+    def line_parts(self):
+        # The row's fields in file order: GUID;class;order;family;genus;species;common
+        return self[:7]
 
 class TaxonomyLoader:
-    def __init__(self, taxonomy_path):
+    # Bump whenever the loaded tables change shape or key normalization changes, so
+    # caches written by older code are rebuilt
+    CACHE_VERSION = 1
+
+    # Files at least this big skip pyarrow, which builds the whole table in memory,
+    # and are read line by line instead
+    STREAMING_MIN_BYTES = 8 * 1024 * 1024
+
+    # Rows are normalized and indexed this many at a time, so the intermediate
+    # name lists never grow past one chunk
+    CHUNK_ROWS = 50_000
+
+    def __init__(self, taxonomy_path, max_rows=None):
         self.taxonomy_path = taxonomy_path
+
+        # Rows are stored column-wise, one list per field, all indexed by row number
+        self.guids = []
+        self.classes = []
+        self.orders = []
+        self.families = []
+        self.genera = []
+        self.species = []
+        self.commons = [] # canonical common names
+        self.latin_names = [] # standardized lowercase Latin names
+
+        # Normalized name -> row number; latin_to_row doubles as the set of valid
+        # Latin names
         self.latin_to_row = {}
         self.common_to_row = {}
-        self.valid_latin_names = set()
-        self.load()
 
-    def load(self):
+        # Latin name -> row number, split by the rank of the row's deepest populated
+        # field, so hierarchical lookups at one rank can't hit a row of another rank
+        self.species_to_row = {} # keyed by "genus species"
+        self.genus_to_row = {}
+        self.family_to_row = {}
+        self.order_to_row = {}
+        self.class_to_row = {}
+
+        self._init_caches()
+        self.load(max_rows)
+
+    def _init_caches(self):
+        # The taxonomy doesn't change once loaded, so repeated Gemini candidates
+        # (species lists are dominated by a few names) are memoized per instance
+        self._hierarchy_cache = functools.lru_cache(maxsize=4096)(self._get_by_hierarchy)
+
+    def __getstate__(self):
+        # The memoized lookup wraps a bound method and can't be pickled; it's
+        # rebuilt empty on unpickling
+        state = self.__dict__.copy()
+        del state['_hierarchy_cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_caches()
+
+    @classmethod
+    def from_cache(cls, taxonomy_path):
+        """
+        Load a taxonomy, reusing a pickled copy of the loaded tables stored next to the
+        file (taxonomy_path + '.pickle') when it matches the file's size and modification
+        time. Otherwise the file is parsed and the cache is (re)written if possible.
+        The cache is unpickled, so anyone who can write it can run code in this
+        process: the directory holding the taxonomy file must be writable only by
+        the app.
+        """
+        if not os.path.exists(taxonomy_path):
+            return cls(taxonomy_path)
+
+        # Pickle restores the index dicts as they were built. A columnar format
+        # (e.g. Arrow IPC) would map the columns in cheaply but then have to
+        # rebuild every index, which costs more than unpickling at this size.
+        cache_path = taxonomy_path + '.pickle'
+        stat = os.stat(taxonomy_path)
+        stamp = (cls.CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_stamp, loader = pickle.load(f)
+            if cached_stamp == stamp and isinstance(loader, cls):
+                loader.taxonomy_path = taxonomy_path
+                return loader
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable taxonomy cache {cache_path}: {e}")
+
+        loader = cls(taxonomy_path)
+        try:
+            # Write to a temporary file first, so a concurrent reader never sees a
+            # partial cache
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump((stamp, loader), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write taxonomy cache {cache_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return loader
+
+    def load(self, max_rows=None):
+        """
+        Read the taxonomy file into the column lists and indexes. If max_rows is
+        given, reading stops once that many rows have been stored.
+        """
         if not os.path.exists(self.taxonomy_path):
             print(f"Warning: Taxonomy file not found at {self.taxonomy_path}")
             return
 
-        with open(self.taxonomy_path, 'r', encoding='utf-8') as f:
-            # The file is semicolon delimited, no header based on 'head' output
-            # Format: GUID;class;order;family;genus;species;common
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(';')
-                if len(parts) < 7:
-                    continue
-
-                # Extract parts
-                guid = parts[0]
-                # class_ = parts[1] # Reserved word
-                # order = parts[2]
-                # family = parts[3]
-                genus = parts[4]
-                species_epithet = parts[5]
-                common_name = parts[6]
-
-                # Construct standard Latin name
-                if species_epithet:
-                    latin_name = f"{genus} {species_epithet}".lower()
-                elif genus:
-                    latin_name = genus.lower()
-                elif parts[3]: # Family
-                    latin_name = parts[3].lower()
-                elif parts[2]: # Order
-                    latin_name = parts[2].lower()
-                elif parts[1]: # Class
-                    latin_name = parts[1].lower()
-                else:
-                    continue # Should not happen for valid rows
-
-                # Store mapping
-                # We store the whole row (parts) or a structured dict to retrieve canonical casing later
-                entry = {
-                    "latin": latin_name, # standardized lowercase
-                    "common": common_name, # canonical common name
-                    "line_parts": parts
-                }
-
-                self.latin_to_row[latin_name] = entry
-                self.valid_latin_names.add(latin_name)
-
-                if common_name:
-                    self.common_to_row[common_name.lower()] = entry
+        # This loop runs once per row, so the lookups it repeats are bound to
+        # locals up front
+        species_to_row = self.species_to_row
+        genus_to_row = self.genus_to_row
+        family_to_row = self.family_to_row
+        order_to_row = self.order_to_row
+        class_to_row = self.class_to_row
+        append_guid = self.guids.append
+        append_class = self.classes.append
+        append_order = self.orders.append
+        append_family = self.families.append
+        append_genus = self.genera.append
+        append_species = self.species.append
+        append_common = self.commons.append
+        chunk_rows = self.CHUNK_ROWS
+        rows_left = max_rows
+
+        # Column values repeat a lot (every mammal row says 'mammalia'), so only
+        # one string object is kept per distinct value
+        shared_values = {}
+        share = shared_values.setdefault
+
+        # Latin names (before normalization) and rank indexes of the rows read
+        # since the last chunk was indexed
+        raw_latin_names = []
+        row_ranks = []
+
+        # The file is semicolon delimited, no header based on 'head' output
+        # Format: GUID;class;order;family;genus;species;common
+        for parts in self.read_rows(streaming=max_rows is not None):
+            if rows_left is not None and rows_left <= 0:
+                break
+
+            # Whitespace-only lines come through as a single field
+            if len(parts) < 7:
+                continue
+
+            # Extract parts (class is a reserved word)
+            guid, class_, order, family, genus, species_epithet, common_name = parts[:7]
+            common_name = common_name.strip()
+
+            # Construct standard Latin name, and find the row's rank
+            if species_epithet:
+                latin_name = f"{genus} {species_epithet}"
+                rank_to_row = species_to_row
+            elif genus:
+                latin_name = genus
+                rank_to_row = genus_to_row
+            elif family:
+                latin_name = family
+                rank_to_row = family_to_row
+            elif order:
+                latin_name = order
+                rank_to_row = order_to_row
+            elif class_:
+                latin_name = class_
+                rank_to_row = class_to_row
+            else:
+                continue # Should not happen for valid rows
+
+            # Store the row's fields column-wise
+            append_guid(guid)
+            append_class(share(class_, class_))
+            append_order(share(order, order))
+            append_family(share(family, family))
+            append_genus(share(genus, genus))
+            append_species(share(species_epithet, species_epithet))
+            append_common(share(common_name, common_name))
+            raw_latin_names.append(latin_name)
+            row_ranks.append(rank_to_row)
+            if rows_left is not None:
+                rows_left -= 1
+
+            if len(raw_latin_names) >= chunk_rows:
+                self._index_rows(raw_latin_names, row_ranks)
+                raw_latin_names = []
+                row_ranks = []
+
+        self._index_rows(raw_latin_names, row_ranks)
+
+    def _index_rows(self, raw_latin_names, row_ranks):
+        """
+        Normalize the names of the most recently stored rows (whose Latin names and
+        rank indexes are given), and add them to the name indexes.
+        """
+        if not raw_latin_names:
+            return
+
+        # Normalize the name columns in bulk, and map the names to row numbers
+        first_index = len(self.latin_names)
+        latin_names = normalize_names(raw_latin_names)
+        self.latin_names.extend(latin_names)
+        rows = range(first_index, first_index + len(latin_names))
+
+        # Both dicts get the same key object; str caches its hash, so the name
+        # is only hashed once however many indexes it goes into. Python has no
+        # public way to presize a dict, so each index is filled by one C-level
+        # update() and left to resize itself (a handful of times for this file).
+        self.latin_to_row.update(zip(latin_names, rows))
+        for latin_name, rank_to_row, index in zip(latin_names, row_ranks, rows):
+            rank_to_row[latin_name] = index
+
+        common_keys = normalize_names(self.commons[first_index:])
+        self.common_to_row.update(
+            (key, index) for key, index in zip(common_keys, rows) if key)
+
+    def read_rows(self, streaming=False):
+        """
+        Yield the rows of the taxonomy file as sequences of fields.
+        Uses pyarrow when it's installed; files it can't parse as a table with a fixed
+        number of columns (e.g. stray blank or short lines) fall back to the csv module,
+        which reads the file a line at a time. Large files (or any file, if streaming
+        is set) skip pyarrow, so the file is never held in memory all at once.
+        Fields are never quoted, so quote handling is disabled to split exactly on ';'.
+        """
+        if (pyarrow is not None and not streaming
+                and os.path.getsize(self.taxonomy_path) < self.STREAMING_MIN_BYTES):
+            try:
+                table = pyarrow_csv.read_csv(
+                    self.taxonomy_path,
+                    read_options=pyarrow_csv.ReadOptions(autogenerate_column_names=True),
+                    parse_options=pyarrow_csv.ParseOptions(delimiter=';', quote_char=False),
+                    # Keep every column as strings, even when all its values are empty
+                    convert_options=pyarrow_csv.ConvertOptions(
+                        column_types={f"f{i}": pyarrow.string() for i in range(7)}))
+            except pyarrow.ArrowInvalid:
+                pass
+            else:
+                yield from zip(*(column.to_pylist() for column in table.columns))
+                return
+
+        # newline='' lets the reader split lines on '\n' and '\r' only, like pyarrow.
+        # Blank lines come through as empty rows, which load() skips as too short.
+        with open(self.taxonomy_path, encoding='utf-8', newline='') as f:
+            yield from csv.reader(f, delimiter=';', quoting=csv.QUOTE_NONE)
+
+    def get_entry(self, index):
+        """
+        Build the TaxonomyEntry for a row number.
+        """
+        return TaxonomyEntry(
+            self.guids[index], self.classes[index], self.orders[index], self.families[index],
+            self.genera[index], self.species[index], self.commons[index], self.latin_names[index]
+        )
 
     def get_by_latin(self, latin_name):
-        return self.latin_to_row.get(latin_name.lower().strip())
+        return self.get_by_latin_key(normalize_name(latin_name))
 
     def get_by_common(self, common_name):
-        return self.common_to_row.get(common_name.lower().strip())
+        return self.get_by_common_key(normalize_name(common_name))
+
+    def get_by_latin_key(self, key):
+        """
+        Like get_by_latin, for a name that has already been through normalize_name.
+        """
+        index = self.latin_to_row.get(key)
+        return None if index is None else self.get_entry(index)
+
+    def get_by_common_key(self, key):
+        """
+        Like get_by_common, for a name that has already been through normalize_name.
+        """
+        index = self.common_to_row.get(key)
+        return None if index is None else self.get_entry(index)
 
     def get_by_hierarchy(self, tax_class=None, tax_order=None, tax_family=None, tax_genus=None, tax_species=None):
         """
@@ -74,42 +332,44 @@ class TaxonomyLoader:
         Returns a tuple: (matched_entry, taxonomic_level) or (None, None) if no match.
         taxonomic_level is one of: 'species', 'genus', 'family', 'order', 'class'
         """
-        # Normalize inputs to lowercase
-        if tax_class: tax_class = tax_class.lower().strip()
-        if tax_order: tax_order = tax_order.lower().strip()
-        if tax_family: tax_family = tax_family.lower().strip()
-        if tax_genus: tax_genus = tax_genus.lower().strip()
-        if tax_species: tax_species = tax_species.lower().strip()
-
-        # Try species level first (genus + species)
-        if tax_genus and tax_species:
-            species_name = f"{tax_genus} {tax_species}"
-            entry = self.get_by_latin(species_name)
-            if entry:
-                return (entry, 'species')
+        return self._hierarchy_cache(tax_class, tax_order, tax_family, tax_genus, tax_species)
 
-        # Try genus level
-        if tax_genus:
-            entry = self.get_by_latin(tax_genus)
-            if entry:
-                return (entry, 'genus')
+    def _get_by_hierarchy(self, tax_class, tax_order, tax_family, tax_genus, tax_species):
+        # Normalize each input exactly once; the lookups below use the
+        # already-normalized keys directly
+        if tax_class: tax_class = normalize_name(tax_class)
+        if tax_order: tax_order = normalize_name(tax_order)
+        if tax_family: tax_family = normalize_name(tax_family)
+        if tax_genus: tax_genus = normalize_name(tax_genus)
+        if tax_species: tax_species = normalize_name(tax_species)
 
-        # Try family level
-        if tax_family:
-            entry = self.get_by_latin(tax_family)
-            if entry:
-                return (entry, 'family')
+        # Try each rank in turn, from species (genus + species) up to class
+        ranks = (
+            ('species', self.species_to_row, f"{tax_genus} {tax_species}" if tax_genus and tax_species else None),
+            ('genus', self.genus_to_row, tax_genus),
+            ('family', self.family_to_row, tax_family),
+            ('order', self.order_to_row, tax_order),
+            ('class', self.class_to_row, tax_class),
+        )
+        for level, rank_to_row, name in ranks:
+            if name:
+                index = rank_to_row.get(name)
+                if index is not None:
+                    return (self.get_entry(index), level)
 
-        # Try order level
-        if tax_order:
-            entry = self.get_by_latin(tax_order)
-            if entry:
-                return (entry, 'order')
+        return (None, None)
 
-        # Try class level
-        if tax_class:
-            entry = self.get_by_latin(tax_class)
+    def get_first_by_hierarchy(self, hierarchies):
+        """
+        Batch version of get_by_hierarchy for any iterable of candidate hierarchies,
+        each a (class, order, family, genus, species) tuple, tried in order. Iteration
+        stops at the first match, so a generator is only consumed that far.
+        Returns (matched_entry, taxonomic_level) for the first candidate that matches,
+        or (None, None) if none do.
+        """
+        get_by_hierarchy = self.get_by_hierarchy
+        for hierarchy in hierarchies:
+            entry, level = get_by_hierarchy(*hierarchy)
             if entry:
-                return (entry, 'class')
-
+                return (entry, level)
         return (None, None)
@@ -0,0 +1,11 @@
+import gc
+from app import create_app
+
+# Entry point for production WSGI servers, e.g.:
+#   gunicorn --preload --bind 0.0.0.0:5000 wsgi:app
+app = create_app()
+
+# Move everything loaded so far (mostly the taxonomy) out of the garbage collector's
+# view, so collections in forked workers don't write to those pages and break
+# copy-on-write sharing with the master process
+gc.freeze()